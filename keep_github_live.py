@@ -1,3 +1,5 @@
+import fcntl
+import os
 from pathlib import Path
 
 
@@ -6,27 +8,35 @@ def read_increment_write_counter(file_path: Path) -> int:
     Reads an integer from file_path, increments it by 1, and writes it back.
     If the file does not exist or contains invalid data, starts from 0.
 
+    The file is opened once and held under an exclusive lock for the whole
+    read-modify-write, so concurrent runs cannot lose an increment.
+
     Returns the new value after incrementing.
     """
-    current = 0
-
+    # Creates the file if missing, which replaces a separate exists() check
+    fd = os.open(file_path, os.O_RDWR | os.O_CREAT, 0o644)
     try:
-        if file_path.exists():
-            raw = file_path.read_text(encoding="utf-8").strip()
-            if raw:
-                try:
-                    current = int(raw)
-                except ValueError:
-                    # If content isn't a valid integer, reset to 0
-                    current = 0
-    except Exception:
-        # If reading fails for any reason, keep current at 0
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
         current = 0
 
-    new_value = current + 1
+        try:
+            raw = os.pread(fd, 64, 0).strip()
+            if raw:
+                current = int(raw)
+        except ValueError:
+            # If content isn't a valid integer, reset to 0
+            current = 0
+
+        new_value = current + 1
 
-    # Write the updated value (with trailing newline for POSIX friendliness)
-    file_path.write_text(f"{new_value}\n", encoding="utf-8")
+        # Write the updated value (with trailing newline for POSIX friendliness)
+        data = f"{new_value}\n".encode("utf-8")
+        os.pwrite(fd, data, 0)
+        os.ftruncate(fd, len(data))
+    finally:
+        # Closing the descriptor also releases the lock
+        os.close(fd)
 
     return new_value
 
@@ -40,4 +50,4 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -6,12 +6,100 @@ This script sends push notifications through the OneSignal API.
 """
 
 import os
-import json
+import time
+import asyncio
+import hashlib
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import httpx
+import orjson
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+ONESIGNAL_API_URL = "https://onesignal.com/api/v1/notifications"
+
+# Headers shared by every request; only Authorization varies per API key
+BASE_HEADERS = {
+    "Accept": "application/json",
+    "Content-Type": "application/json"
+}
+
+# Target only Android devices
+ANDROID_TARGETING = {
+    "isAndroid": True,
+    "isIos": False,
+    "isAnyWeb": False,
+    "isHuawei": False,
+    "isAdm": False,
+    "isChrome": False,
+    "isFirefox": False,
+    "isSafari": False,
+    "isWP_WNS": False
+}
+
+# (connect, read) timeouts in seconds for OneSignal API calls
+REQUEST_TIMEOUT = (3.05, 10)
+
+# Reuse one pooled session so repeated sends skip the TCP + TLS handshake.
+# POST is not in Retry's default allowed_methods, so only failures that happen
+# before the request reaches OneSignal are retried and nothing is sent twice.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[429, 500, 502, 503, 504])
+))
+
+# Connection limits for the async client; OneSignal rate limits per app, so
+# the number of requests in flight is capped separately by ASYNC_MAX_IN_FLIGHT
+ASYNC_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+ASYNC_MAX_IN_FLIGHT = 32
+
+# Seconds a successful response is reused for an identical payload
+RESPONSE_CACHE_TTL = 300
+
+# Successful responses keyed by payload hash: key -> (response, expires_at)
+_RESPONSE_CACHE = {}
+
+class TokenBucket:
+    """Token bucket rate limiter refilling at `rate` tokens per second up to `capacity`"""
+    
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def reserve(self, n=1):
+        """
+        Take n tokens, going into debt if the bucket is short
+        
+        Returns:
+            float: Seconds the caller must wait before the tokens are available
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= n
+            return max(0.0, -self.tokens / self.rate)
+    
+    def acquire(self, n=1):
+        """Block until n tokens are available"""
+        wait = self.reserve(n)
+        if wait:
+            time.sleep(wait)
+
+# Shared by the sync and async send paths to stay clear of OneSignal 429s
+_RATE_LIMITER = TokenBucket(rate=10, capacity=20)
+
+@functools.lru_cache(maxsize=1)
 def load_credentials():
-    """Load OneSignal credentials from .env file"""
+    """Load OneSignal credentials from .env file (parsed once per process)"""
     load_dotenv()
     app_id = os.getenv("LEGAL_ADVICE_ONESIGNAL_APP_ID")
     api_key = os.getenv("LEGAL_ADVICE_ONESIGNAL_API_KEY")
@@ -21,14 +109,13 @@ def load_credentials():
     
     return app_id, api_key
 
-def send_notification(app_id, api_key, name=None, heading=None, 
-                     message=None, url=None, segment=None, big_picture=None, show_rate_button=None, data=None):
+def build_payload(app_id, name=None, heading=None, message=None, url=None,
+                  segment=None, big_picture=None, show_rate_button=None, data=None):
     """
-    Send a push notification through OneSignal API
+    Build the OneSignal notification payload
     
     Args:
         app_id (str): OneSignal App ID
-        api_key (str): OneSignal REST API Key
         name (str, optional): Name of the notification for tracking purposes. Defaults to None.
         heading (str, optional): Notification title. Defaults to None.
         message (str): Notification message content
@@ -39,27 +126,12 @@ def send_notification(app_id, api_key, name=None, heading=None,
         data (dict, optional): Additional data to include. Defaults to None.
     
     Returns:
-        dict: API response
+        dict: Request body for the notifications endpoint
     """
-    headers = {
-        "Accept": "application/json",
-        "Authorization": f"Basic {api_key}",
-        "Content-Type": "application/json"
-    }
-    
     payload = {
+        **ANDROID_TARGETING,
         "app_id": app_id,
-        "contents": {"en": message},
-        # Target only Android devices
-        "isAndroid": True,
-        "isIos": False,
-        "isAnyWeb": False,
-        "isHuawei": False,
-        "isAdm": False,
-        "isChrome": False,
-        "isFirefox": False,
-        "isSafari": False,
-        "isWP_WNS": False
+        "contents": {"en": message}
     }
     
     # Add segment if provided (default to "All" if not specified)
@@ -90,13 +162,234 @@ def send_notification(app_id, api_key, name=None, heading=None,
     if name:
         payload["name"] = name
     
-    response = requests.post(
-        "https://onesignal.com/api/v1/notifications",
-        headers=headers,
-        json=payload
+    return payload
+
+@functools.lru_cache(maxsize=8)
+def build_headers(api_key):
+    """
+    Build the request headers for an API key, cached per key
+    
+    Args:
+        api_key (str): OneSignal REST API Key
+    
+    Returns:
+        dict: Request headers (shared between calls, do not modify)
+    """
+    return {**BASE_HEADERS, "Authorization": f"Basic {api_key}"}
+
+def payload_cache_key(payload):
+    """Return a stable hash of a payload for response caching"""
+    body = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+def get_cached_response(key):
+    """Return the cached response for key if it has not expired, else None"""
+    cached = _RESPONSE_CACHE.get(key)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+    _RESPONSE_CACHE.pop(key, None)
+    return None
+
+def cache_response(key, response):
+    """Cache a response if OneSignal accepted the notification"""
+    if response.get("id"):
+        _RESPONSE_CACHE[key] = (response, time.monotonic() + RESPONSE_CACHE_TTL)
+
+def post_payload(api_key, payload):
+    """
+    POST a prepared payload to the OneSignal API over the pooled session
+    
+    Args:
+        api_key (str): OneSignal REST API Key
+        payload (dict): Request body built by build_payload
+    
+    Returns:
+        dict: API response, reused from cache for a repeated payload
+    """
+    key = payload_cache_key(payload)
+    cached = get_cached_response(key)
+    if cached is not None:
+        return cached
+    
+    _RATE_LIMITER.acquire()
+    response = _SESSION.post(
+        ONESIGNAL_API_URL,
+        headers=build_headers(api_key),
+        data=orjson.dumps(payload),
+        timeout=REQUEST_TIMEOUT
     )
     
-    return response.json()
+    result = orjson.loads(response.content)
+    cache_response(key, result)
+    return result
+
+def send_notification(app_id, api_key, name=None, heading=None, 
+                     message=None, url=None, segment=None, big_picture=None, show_rate_button=None, data=None):
+    """
+    Send a push notification through OneSignal API
+    
+    Args:
+        app_id (str): OneSignal App ID
+        api_key (str): OneSignal REST API Key
+        name (str, optional): Name of the notification for tracking purposes. Defaults to None.
+        heading (str, optional): Notification title. Defaults to None.
+        message (str): Notification message content
+        url (str, optional): URL to open when notification is clicked. Defaults to None.
+        segment (str, optional): Target audience segment. Defaults to None.
+        big_picture (str, optional): URL of the image to display in the notification. Defaults to None.
+        show_rate_button (bool, optional): Whether to show a Rate button. Defaults to None.
+        data (dict, optional): Additional data to include. Defaults to None.
+    
+    Returns:
+        dict: API response
+    """
+    payload = build_payload(
+        app_id,
+        name=name,
+        heading=heading,
+        message=message,
+        url=url,
+        segment=segment,
+        big_picture=big_picture,
+        show_rate_button=show_rate_button,
+        data=data
+    )
+    
+    return post_payload(api_key, payload)
+
+def merge_payloads(payloads):
+    """
+    Collapse payloads that differ only in their target segments
+    
+    OneSignal delivers to the union of included_segments, so notifications with
+    identical content can go out as a single request. Payloads without segments
+    are never merged since they target differently.
+    
+    Args:
+        payloads (list): Payloads built by build_payload
+    
+    Returns:
+        list: Merged payloads, in order of first appearance
+    """
+    merged = {}
+    
+    for payload in payloads:
+        segments = payload.get("included_segments")
+        content = {k: v for k, v in payload.items() if k != "included_segments"}
+        key = (segments is not None, orjson.dumps(content, option=orjson.OPT_SORT_KEYS))
+        
+        if key not in merged:
+            merged[key] = dict(payload)
+            if segments is not None:
+                merged[key]["included_segments"] = list(segments)
+        elif segments is not None:
+            target = merged[key]["included_segments"]
+            target.extend(s for s in segments if s not in target)
+    
+    return list(merged.values())
+
+def send_notifications_batch(app_id, api_key, configs, max_workers=16):
+    """
+    Send several notifications, merging identical ones and sending the rest concurrently
+    
+    Args:
+        app_id (str): OneSignal App ID
+        api_key (str): OneSignal REST API Key
+        configs (list): Notification configurations using send_notification's keyword arguments
+        max_workers (int): Maximum number of requests in flight at once
+    
+    Returns:
+        list: API responses, one per merged notification
+    """
+    payloads = merge_payloads([build_payload(app_id, **config) for config in configs])
+    
+    if not payloads:
+        return []
+    
+    # Requests share the session's keep-alive pool, so total latency is
+    # roughly the slowest round trip rather than the sum of all of them
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(payloads))) as executor:
+        futures = {executor.submit(post_payload, api_key, payload): index
+                   for index, payload in enumerate(payloads)}
+        responses = [None] * len(payloads)
+        for future in as_completed(futures):
+            responses[futures[future]] = future.result()
+    
+    return responses
+
+async def post_payload_async(client, api_key, payload):
+    """
+    POST a prepared payload to the OneSignal API without blocking the event loop
+    
+    Args:
+        client (httpx.AsyncClient): Client to send the request with
+        api_key (str): OneSignal REST API Key
+        payload (dict): Request body built by build_payload
+    
+    Returns:
+        dict: API response, reused from cache for a repeated payload
+    """
+    key = payload_cache_key(payload)
+    cached = get_cached_response(key)
+    if cached is not None:
+        return cached
+    
+    wait = _RATE_LIMITER.reserve()
+    if wait:
+        await asyncio.sleep(wait)
+    response = await client.post(
+        ONESIGNAL_API_URL,
+        headers=build_headers(api_key),
+        content=orjson.dumps(payload)
+    )
+    
+    result = orjson.loads(response.content)
+    cache_response(key, result)
+    return result
+
+async def send_notification_async(client, app_id, api_key, **kwargs):
+    """
+    Send a push notification through OneSignal API asynchronously
+    
+    Args:
+        client (httpx.AsyncClient): Client to send the request with
+        app_id (str): OneSignal App ID
+        api_key (str): OneSignal REST API Key
+        **kwargs: Notification fields, as accepted by send_notification
+    
+    Returns:
+        dict: API response
+    """
+    return await post_payload_async(client, api_key, build_payload(app_id, **kwargs))
+
+async def _send_many(app_id, api_key, configs, max_in_flight):
+    semaphore = asyncio.Semaphore(max_in_flight)
+    timeout = httpx.Timeout(REQUEST_TIMEOUT[1], connect=REQUEST_TIMEOUT[0])
+    
+    async with httpx.AsyncClient(http2=True, timeout=timeout, limits=ASYNC_LIMITS) as client:
+        async def send(config):
+            async with semaphore:
+                return await send_notification_async(client, app_id, api_key, **config)
+        
+        return await asyncio.gather(*(send(config) for config in configs))
+
+def send_many(app_id, api_key, configs, max_in_flight=ASYNC_MAX_IN_FLIGHT):
+    """
+    Send several notifications concurrently over a single HTTP/2 connection
+    
+    The client is created per call because an httpx.AsyncClient is bound to
+    the event loop that asyncio.run creates.
+    
+    Args:
+        app_id (str): OneSignal App ID
+        api_key (str): OneSignal REST API Key
+        configs (list): Notification configurations using send_notification's keyword arguments
+        max_in_flight (int): Maximum number of requests awaiting a response at once
+    
+    Returns:
+        list: API responses, in the same order as configs
+    """
+    return asyncio.run(_send_many(app_id, api_key, configs, max_in_flight))
 
 def save_config_to_json(config, json_file_path="legal_advice_onesignal.json"):
     """
@@ -107,8 +400,9 @@ def save_config_to_json(config, json_file_path="legal_advice_onesignal.json"):
         json_file_path (str): Path to the JSON configuration file
     """
     try:
-        with open(json_file_path, 'w', encoding='utf-8') as file:
-            json.dump(config, file, indent=2, ensure_ascii=False)
+        # orjson always emits UTF-8, so emoji are written as-is
+        with open(json_file_path, 'wb') as file:
+            file.write(orjson.dumps(config, option=orjson.OPT_INDENT_2))
         print(f"Configuration saved to {json_file_path}")
     except Exception as e:
         raise ValueError(f"Failed to save configuration to {json_file_path}: {e}")
@@ -124,9 +418,9 @@ def load_config_from_json(json_file_path="legal_advice_onesignal.json"):
         dict: Configuration parameters
     """
     try:
-        # Explicitly use UTF-8 encoding to handle emoji and special characters
-        with open(json_file_path, 'r', encoding='utf-8') as file:
-            config = json.load(file)
+        # orjson decodes raw bytes as UTF-8, which covers emoji and special characters
+        with open(json_file_path, 'rb') as file:
+            config = orjson.loads(file.read())
         
         # Validate required fields
         required_fields = ['name', 'heading', 'message', 'url', 'segment', 'big_picture', 'show_rate_button']
@@ -141,10 +435,9 @@ def load_config_from_json(json_file_path="legal_advice_onesignal.json"):
         return config
     except FileNotFoundError:
         raise FileNotFoundError(f"Configuration file not found: {json_file_path}")
-    except json.JSONDecodeError:
-        raise ValueError(f"Invalid JSON format in configuration file: {json_file_path}")
-    except UnicodeDecodeError as e:
-        raise ValueError(f"Character encoding error in configuration file: {e}. Please ensure the file is saved with UTF-8 encoding.")
+    except orjson.JSONDecodeError as e:
+        # orjson reports invalid UTF-8 as a decode error too
+        raise ValueError(f"Invalid JSON format in configuration file: {json_file_path} ({e}). Please ensure the file is valid JSON saved with UTF-8 encoding.")
 
 def main():
     """Main function to send a notification"""
@@ -190,7 +483,7 @@ def main():
         
         # Display the response
         print("\nAPI Response:")
-        print(json.dumps(response, indent=2))
+        print(orjson.dumps(response, option=orjson.OPT_INDENT_2).decode())
         
         if response.get("id"):
             print(f"\nSuccess! Notification sent with ID: {response['id']}")